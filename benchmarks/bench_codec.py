@@ -0,0 +1,56 @@
+"""
+Compares smartz.codec with the generic eth_abi encoder on large array payloads.
+
+    python benchmarks/bench_codec.py [elements]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+from eth_abi import decode, encode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smartz.codec import OracleCodec
+
+
+def payloads(count):
+    rnd = random.Random(0)
+    uint64 = [rnd.getrandbits(64) for _ in range(count)]
+    int64 = [rnd.getrandbits(64) - 2 ** 63 for _ in range(count)]
+    uint256 = [rnd.getrandbits(256) for _ in range(count)]
+    address = ['0x%040x' % rnd.getrandbits(160) for _ in range(count)]
+    return [
+        ('uint64[]', uint64, np.array(uint64, dtype=np.uint64)),
+        ('int64[]', int64, np.array(int64, dtype=np.int64)),
+        ('uint256[]', uint256, memoryview(b''.join(v.to_bytes(32, 'big') for v in uint256))),
+        ('address[]', address, memoryview(b''.join(bytes.fromhex(a[2:]) for a in address))),
+    ]
+
+
+def best(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(count):
+    print('{:<10} {:>12} {:>12} {:>12} {:>12}'.format('type', 'abi encode', 'codec', 'abi decode', 'codec'))
+    for data_type, values, native in payloads(count):
+        codec = OracleCodec(data_type)
+        return_data = encode([data_type], [values])
+
+        assert codec.encode_update(native, 1) == codec.selector + encode([data_type, 'uint256'], [values, 1])
+
+        print('{:<10} {:>10.2f}ms {:>10.2f}ms {:>10.2f}ms {:>10.2f}ms'.format(
+            data_type,
+            1000 * best(lambda: codec.selector + encode([data_type, 'uint256'], [values, 1])),
+            1000 * best(lambda: codec.encode_update(native, 1)),
+            1000 * best(lambda: decode([data_type], return_data)),
+            1000 * best(lambda: codec.decode_data(return_data)),
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
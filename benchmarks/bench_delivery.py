@@ -0,0 +1,105 @@
+"""
+Gas cost of pushing data updates to subscriber contracts, on a local in-process chain.
+
+    python benchmarks/bench_delivery.py [subscribers ...]
+
+For each number of subscribers reports gas of the final updateData confirmation when
+everything is delivered in one transaction, and number of transactions and total gas
+when updateData and the following deliver() calls are limited to TX_GAS each.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smartz.constructor import Constructor
+from smartz.loadtest import BLOCK_GAS_LIMIT, TX_GAS, LocalChain
+
+
+PRICE = 10 ** 15
+SENDERS = 20
+
+# language=Solidity
+SUBSCRIBER_SOURCE = """
+pragma solidity ^0.4.24;
+
+contract Subscriber {
+    uint256 public value;
+    uint256 public updated;
+
+    function onOracleData(uint256 _data, uint256 _ts) external {
+        value = _data;
+        updated = _ts;
+    }
+}
+"""
+
+
+def update_data(chain, oracle, owners, value, gas):
+    functions = oracle.functions
+    nonce = functions.nonce().call()
+    chain.send(functions.updateData(value, nonce), owners[0])
+    chain.mine()
+    tx_hash = chain.send(functions.updateData(value, nonce), owners[1], gas=gas)
+    chain.mine()
+    receipt = chain.receipt(tx_hash)
+    assert receipt['status'] == 1
+    return receipt['gasUsed']
+
+
+def measure(subscribers_count):
+    chain = LocalChain(num_accounts=2 + SENDERS)
+    owners, senders = chain.accounts[:2], chain.accounts[2:]
+
+    result = Constructor().construct({
+        'dataType': 'uint', 'integerSize': 256, 'isArray': False, 'price': PRICE,
+        'owners': owners, 'signs_count': 2,
+        'subscriptions': True, 'subscriberGas': 100000,
+    })
+    oracle = chain.deploy(result)
+
+    abi, bytecode = chain.compile(SUBSCRIBER_SOURCE, 'Subscriber')
+    factory = chain.web3.eth.contract(abi=abi, bytecode=bytecode)
+    for start in range(0, subscribers_count, SENDERS):
+        batch = range(start, min(start + SENDERS, subscribers_count))
+        deployments = [chain.send(factory.constructor(), senders[i % SENDERS]) for i in batch]
+        chain.mine()
+        subscriptions = [
+            chain.send(oracle.functions.subscribe(chain.receipt(tx_hash)['contractAddress']),
+                       senders[i % SENDERS], value=10 * PRICE)
+            for i, tx_hash in zip(batch, deployments)
+        ]
+        chain.mine()
+        assert all(chain.receipt(tx_hash)['status'] == 1 for tx_hash in subscriptions)
+
+    full_gas = update_data(chain, oracle, owners, 1, BLOCK_GAS_LIMIT)
+    assert oracle.functions.deliveryCursor().call() == subscribers_count
+
+    batched_gas = update_data(chain, oracle, owners, 2, TX_GAS)
+    transactions = 1
+    while oracle.functions.deliveryCursor().call() < subscribers_count:
+        tx_hash = chain.send(oracle.functions.deliver(), senders[0])
+        chain.mine()
+        batched_gas += chain.receipt(tx_hash)['gasUsed']
+        transactions += 1
+
+    return full_gas, batched_gas, transactions
+
+
+def main(counts):
+    baseline = measure(0)[0]
+    print('{:>11} {:>12} {:>14} {:>8} {:>14}'.format(
+        'subscribers', 'gas', 'gas/subscriber', 'txs', 'gas/subscriber'))
+    for count in counts:
+        full_gas, batched_gas, transactions = measure(count)
+        print('{:>11} {:>12} {:>14} {:>8} {:>14}'.format(
+            count, full_gas,
+            (full_gas - baseline) // count if count else 0,
+            transactions,
+            (batched_gas - baseline) // count if count else 0,
+        ))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 50, 100, 200])
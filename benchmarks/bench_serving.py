@@ -0,0 +1,81 @@
+"""
+Latency of a burst of concurrent construct requests, called directly and through ConstructorService.
+
+    python benchmarks/bench_serving.py [requests] [distinct configurations] [compile ms]
+
+compile ms simulates compilation of the constructed source (a sleep, like waiting for solc).
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smartz.constructor import Constructor
+from smartz.serving import ConstructorService, percentiles
+
+
+OWNERS = ['0x%040x' % (idx + 1) for idx in range(10)]
+
+
+def fields(idx):
+    return {
+        'dataType': 'uint', 'integerSize': 256, 'isArray': True,
+        'price': 10 ** 15 + idx, 'owners': OWNERS, 'signs_count': 2,
+    }
+
+
+def make_work(compile_delay):
+    constructor = Constructor()
+
+    def work(fields_vals):
+        result = constructor.construct(fields_vals)
+        time.sleep(compile_delay)
+        return result
+
+    return work
+
+
+def burst(call, requests, distinct):
+    latencies = []
+
+    def request(fields_vals):
+        started_at = time.time()
+        call(fields_vals)
+        latencies.append(time.time() - started_at)
+
+    threads = [threading.Thread(target=request, args=(fields(idx % distinct),)) for idx in range(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return percentiles(latencies)
+
+
+def main(requests, distinct, compile_delay):
+    print('{:<10} {:<8} {:>9} {:>8} {:>11} {:>11} {:>11}'.format(
+        'burst', 'mode', 'coalesced', 'rejected', 'wait p99', 'p50', 'p99'))
+    for name, configurations in (('identical', 1), ('distinct', distinct)):
+        work = make_work(compile_delay)
+
+        direct = burst(work, requests, configurations)
+        print('{:<10} {:<8} {:>9} {:>8} {:>11} {:>9.2f}ms {:>9.2f}ms'.format(
+            name, 'direct', '-', '-', '-', 1000 * direct['p50'], 1000 * direct['p99']))
+
+        service = ConstructorService(work=work, queue_timeout=5.0)
+        burst(service.construct, requests, configurations)
+        stats = service.stats()
+        print('{:<10} {:<8} {:>9} {:>8} {:>9.2f}ms {:>9.2f}ms {:>9.2f}ms'.format(
+            name, 'service', stats['coalesced'], stats['rejected'],
+            1000 * stats['wait_time']['p99'],
+            1000 * stats['latency']['p50'],
+            1000 * stats['latency']['p99'],
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+         float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0)
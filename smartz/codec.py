@@ -0,0 +1,226 @@
+"""
+ABI codec for updateData calldata and getData results of generated oracles.
+
+Unlike generic ABI libraries, a codec is specialized for one data type of the constructor,
+so arrays of fixed-width integers and addresses are packed into and unpacked
+from 32-byte words with NumPy in bulk instead of element by element.
+
+Arrays may be given as sequences, NumPy arrays or any buffer (bytes, memoryview, ...).
+Buffers are used without copying: arrays of integers up to 64 bits are read as OracleCodec.dtype
+(native byte order), arrays of wider integers as packed 32-byte big-endian (ABI) words,
+address arrays as packed 20-byte addresses.
+"""
+
+import numpy as np
+
+from smartz.data_type import data_type
+
+
+WORD = 32
+
+
+def _keccak(data):
+    from eth_hash.auto import keccak
+    return keccak(data)
+
+
+class OracleCodec(object):
+
+    def __init__(self, data_type):
+        self.data_type = data_type
+        self.is_array = data_type.endswith('[]')
+        self.element_type = data_type[:-2] if self.is_array else data_type
+
+        element = self.element_type
+        self.signed = element.startswith('int')
+        if element.startswith('uint') or element.startswith('int'):
+            self.kind = 'int'
+            self.bits = int(element[4:] if element.startswith('uint') else element[3:])
+        elif element == 'address':
+            self.kind = 'address'
+            self.bits = 160
+        elif element == 'string' and not self.is_array:
+            self.kind = 'string'
+            self.bits = None
+        elif element.startswith('bytes') and not self.is_array:
+            self.kind = 'bytes'
+            self.bits = 8 * int(element[5:])
+        else:
+            # the constructor doesn't generate arrays of strings and bytesN
+            raise ValueError('Unsupported data type {}'.format(data_type))
+
+        # in-memory representation of integers which fit into 64 bits
+        self.dtype = None
+        if self.kind == 'int' and self.bits <= 64:
+            width = next(w for w in (8, 16, 32, 64) if w >= self.bits)
+            self.dtype = np.dtype(('int' if self.signed else 'uint') + str(width))
+
+        self.selector = _keccak('updateData({},uint256)'.format(data_type).encode())[:4]
+
+    @classmethod
+    def from_fields(cls, fields_vals):
+        return cls(data_type(fields_vals))
+
+    @property
+    def is_dynamic(self):
+        return self.is_array or self.kind == 'string'
+
+    def encode_update(self, data, nonce):
+        """
+        Calldata of updateData(data, nonce).
+        """
+        if not self.is_dynamic:
+            return b''.join((self.selector, self._encode_words([data]), _uint_word(nonce)))
+
+        if self.kind == 'string':
+            payload = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+            length = len(payload)
+            payload += b'\0' * (-length % WORD)
+        else:
+            payload = self._encode_words(data)
+            length = len(payload) // WORD
+
+        return b''.join((self.selector, _uint_word(2 * WORD), _uint_word(nonce), _uint_word(length), payload))
+
+    def decode_data(self, return_data):
+        """
+        Value returned by getData. Arrays of integers up to 64 bits are returned as NumPy arrays of
+        self.dtype, address arrays as (n, 20) uint8 arrays, wider integers as lists of ints.
+        """
+        buf = memoryview(return_data)
+        if not self.is_dynamic:
+            value = self._decode_words(buf, 0, 1)[0]
+            return int(value) if self.kind == 'int' else value
+
+        offset = _read_uint(buf, 0)
+        length = _read_uint(buf, offset)
+        if self.kind == 'string':
+            return bytes(buf[offset + WORD:offset + WORD + length]).decode('utf-8')
+
+        return self._decode_words(buf, offset + WORD, length)
+
+    def _encode_words(self, values):
+        if self.kind == 'int':
+            if self.dtype is not None:
+                return _pack_small_ints(self._as_array(values, self.dtype), self.bits, self.signed)
+            if isinstance(values, (bytes, bytearray, memoryview)):
+                words = np.frombuffer(values, dtype=np.uint8)
+                if len(words) % WORD:
+                    raise ValueError('Buffer of {}-byte words is expected'.format(WORD))
+                _check_wide_ints(words.reshape(-1, WORD), self.bits, self.signed)
+                return words.tobytes()
+            return b''.join(_int_word(v, self.bits, self.signed) for v in values)
+
+        if self.kind == 'address':
+            if isinstance(values, (list, tuple)):
+                values = b''.join(_address_bytes(address) for address in values)
+            addresses = self._as_array(values, np.uint8).reshape(-1, 20)
+            words = np.zeros((len(addresses), WORD), dtype=np.uint8)
+            words[:, WORD - 20:] = addresses
+            return words.tobytes()
+
+        # bytesN
+        size = self.bits // 8
+        return b''.join(_fixed_bytes(v, size) for v in values)
+
+    def _decode_words(self, buf, offset, count):
+        words = np.frombuffer(buf, dtype=np.uint8, count=count * WORD, offset=offset).reshape(count, WORD)
+
+        if self.kind == 'int':
+            if self.dtype is not None:
+                return _unpack_small_ints(words, self.bits, self.signed).astype(self.dtype)
+            data = _check_wide_ints(words, self.bits, self.signed).tobytes()
+            return [int.from_bytes(data[i:i + WORD], 'big', signed=self.signed) for i in range(0, len(data), WORD)]
+
+        if self.kind == 'address':
+            if words[:, :WORD - 20].any():
+                raise ValueError('Invalid address encoding')
+            addresses = words[:, WORD - 20:]
+            if not self.is_array:
+                return ['0x' + addresses[0].tobytes().hex()]
+            return addresses
+
+        # bytesN
+        return [words[0, :self.bits // 8].tobytes()]
+
+    @staticmethod
+    def _as_array(values, dtype):
+        if isinstance(values, np.ndarray):
+            if values.dtype.kind not in 'iu':
+                raise ValueError('Integer array is expected, got {}'.format(values.dtype))
+            return values
+        if isinstance(values, (bytes, bytearray, memoryview)):
+            return np.frombuffer(values, dtype=dtype)
+        try:
+            return np.asarray(values, dtype=dtype)
+        except OverflowError as exc:
+            raise ValueError(str(exc))
+
+
+def _pack_small_ints(values, bits, signed):
+    if len(values) and (values.min() < _min_int(bits, signed) or values.max() > _max_int(bits, signed)):
+        raise ValueError('Value does not fit into {} bits'.format(bits))
+
+    words = np.zeros((len(values), WORD), dtype=np.uint8)
+    if signed:
+        words[:, :WORD - 8] = np.where(values < 0, 0xff, 0).astype(np.uint8)[:, None]
+    words[:, WORD - 8:] = values.astype('>i8' if signed else '>u8').view(np.uint8).reshape(-1, 8)
+    return words.tobytes()
+
+
+def _unpack_small_ints(words, bits, signed):
+    tail = np.ascontiguousarray(words[:, WORD - 8:]).view('>i8' if signed else '>u8').ravel()
+    fill = np.where(tail < 0, 0xff, 0).astype(np.uint8)[:, None] if signed else 0
+    if (words[:, :WORD - 8] != fill).any() or \
+            (len(tail) and (tail.min() < _min_int(bits, signed) or tail.max() > _max_int(bits, signed))):
+        raise ValueError('Value does not fit into {} bits'.format(bits))
+    return tail
+
+
+def _check_wide_ints(words, bits, signed):
+    # bytes above the value must repeat its sign bit
+    head = WORD - bits // 8
+    fill = np.where(words[:, head] & 0x80, 0xff, 0).astype(np.uint8)[:, None] if signed else 0
+    if (words[:, :head] != fill).any():
+        raise ValueError('Value does not fit into {} bits'.format(bits))
+    return words
+
+
+def _min_int(bits, signed):
+    return -2 ** (bits - 1) if signed else 0
+
+
+def _max_int(bits, signed):
+    return 2 ** (bits - 1) - 1 if signed else 2 ** bits - 1
+
+
+def _int_word(value, bits, signed):
+    value = int(value)
+    if not _min_int(bits, signed) <= value <= _max_int(bits, signed):
+        raise ValueError('Value does not fit into {} bits'.format(bits))
+    return (value % 2 ** 256).to_bytes(WORD, 'big')
+
+
+def _uint_word(value):
+    return _int_word(value, 256, False)
+
+
+def _read_uint(buf, offset):
+    return int.from_bytes(bytes(buf[offset:offset + WORD]), 'big')
+
+
+def _address_bytes(address):
+    if isinstance(address, str):
+        address = bytes.fromhex(address[2:] if address.startswith('0x') else address)
+    if len(address) != 20:
+        raise ValueError('Invalid address {!r}'.format(address))
+    return bytes(address)
+
+
+def _fixed_bytes(value, size):
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        raise ValueError('Bytes are expected, got {!r}'.format(value))
+    value = bytes(value)
+    if len(value) > size:
+        raise ValueError('Value is longer than {} bytes'.format(size))
+    return value + b'\0' * (WORD - len(value))
@@ -1,5 +1,6 @@
 import time
 from smartz.api.constructor_engine import ConstructorInstance
+from smartz.data_type import data_type
 
 
 class Constructor(ConstructorInstance):
@@ -52,6 +53,24 @@ class Constructor(ConstructorInstance):
                     "title": "Signatures quorum",
                     "description": "Number of signatures required to withdraw funds or modify signatures"
                 },
+
+                "historySize": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "default": 0,
+                    "maximum": 10000,
+                    "title": "History size",
+                    "description": "Number of last data updates kept on-chain for lookup by round or by time (0 - no history). "
+                                   "Every update is also written to the history, which doubles storage gas of updates for array and string data"
+                },
+
+                "subscriptions": {
+                    "title": "Push data to subscribers",
+                    "description": "Consumers can subscribe their contracts by prepaying, "
+                                   "new data will be sent to them on every update at the data price",
+                    "type": "boolean",
+                    "default": False
+                },
             },
 
             "dependencies": {
@@ -112,6 +131,31 @@ class Constructor(ConstructorInstance):
                         },
                         "required": ["isArray"]
                     }]
+                },
+
+                "subscriptions": {
+                    "oneOf": [{
+                        "properties": {
+                            "subscriptions": {
+                                "enum": [True]
+                            },
+                            "subscriberGas": {
+                                "title": "Gas per subscriber",
+                                "description": "Maximum gas which subscriber contract can spend on receiving data",
+                                "type": 'integer',
+                                "minimum": 10000,
+                                "maximum": 1000000,
+                                "default": 100000,
+                            },
+                        },
+                        "required": ["subscriberGas"]
+                    }, {
+                        "properties": {
+                            "subscriptions": {
+                                "enum": [False]
+                            }
+                        }
+                    }]
                 }
             }
         }
@@ -123,6 +167,10 @@ class Constructor(ConstructorInstance):
                 "ui:widget": "updown",
             },
 
+            "historySize": {
+                "ui:widget": "updown",
+            },
+
             "owners": {
                 "items": {
                     "ui:placeholder": "Valid Ethereum address"
@@ -157,27 +205,47 @@ class Constructor(ConstructorInstance):
                 "error_descr": "Signatures quorum is greater than total number of owners"
             }
 
-        dataType = fields_vals['dataType']
-
-        if dataType in ['uint', 'int']:
-            if fields_vals['integerSize'] % 8 != 0:
-                return {
-                    "result": "error",
-                    "error_descr": "Number of bits must be a multiple of 8"
-                }
-            dataType += str(fields_vals['integerSize'])
-        elif dataType == 'bytes':
-            dataType += str(fields_vals['bytesSize'])
+        if fields_vals['dataType'] in ['uint', 'int'] and fields_vals['integerSize'] % 8 != 0:
+            return {
+                "result": "error",
+                "error_descr": "Number of bits must be a multiple of 8"
+            }
 
-        if 'isArray' in fields_vals and fields_vals['isArray'] == True:
-            dataType += '[]'
+        dataType = data_type(fields_vals)
 
         owners_code = 'address[] memory result = new address[]({});\n'.format(len(fields_vals['owners']))
         owners_code += '\n'.join(
             'result[{}] = address({});'.format(idx, owner) for (idx, owner) in enumerate(fields_vals['owners'])
         )
 
+        history_size = fields_vals.get('historySize', 0)
+        if history_size > 0:
+            history_code = self.__class__._HISTORY_TEMPLATE.replace('%history_size%', str(history_size))
+            history_update = 'recordRound();'
+        else:
+            history_code = ''
+            history_update = ''
+
+        if fields_vals.get('subscriptions') == True:
+            subscriptions_code = self.__class__._SUBSCRIPTIONS_TEMPLATE \
+                .replace('%subscriber_gas%', str(fields_vals['subscriberGas']))
+            subscriptions_update = 'startDelivery();'
+            withdraw_check = 'require(_amount + subscribersBalance <= address(this).balance);'
+            # abi.encodeWithSelector is available since 0.4.22
+            solidity_version = '^0.4.22'
+        else:
+            subscriptions_code = ''
+            subscriptions_update = ''
+            withdraw_check = ''
+            solidity_version = '^0.4.15'
+
         source = source \
+            .replace('%history_code%', history_code) \
+            .replace('%history_update%', history_update) \
+            .replace('%subscriptions_code%', subscriptions_code) \
+            .replace('%subscriptions_update%', subscriptions_update) \
+            .replace('%withdraw_check%', withdraw_check) \
+            .replace('%solidity_version%', solidity_version) \
             .replace('%dataType%', dataType) \
             .replace('%price%', str(fields_vals['price'])) \
             .replace('%owners_code%', owners_code) \
@@ -290,6 +358,26 @@ class Constructor(ConstructorInstance):
                 'sorting_order': 110
             },
 
+            'getPendingOperationsIndexLength': {
+                'title': 'Pending operations index size',
+                'description': 'Size of pending operations index, some positions of which may be empty.',
+                'sorting_order': 112
+            },
+
+            'getPendingOperations': {
+                'title': 'Pending operations',
+                'description': 'Returns active pending operations with number of confirmations still needed '
+                               'and bitmaps of owners confirmed them (owner n corresponds to bit n + 1).',
+                'inputs': [{
+                    'title': 'Offset',
+                    'description': 'First position in pending operations index, starting from zero.',
+                }, {
+                    'title': 'Limit',
+                    'description': 'Maximum number of index positions to look through.',
+                }],
+                'sorting_order': 114
+            },
+
             'revoke': {
                 'title': 'Revoke confirmation',
                 'description': 'Revoke confirmation of current owner (current account) from operation.',
@@ -359,6 +447,154 @@ class Constructor(ConstructorInstance):
             },
         }
 
+        if fields_vals.get('historySize', 0) > 0:
+            function_titles.update({
+                'historyCapacity': {
+                    'title': 'History size',
+                    'description': 'Number of last data updates kept on-chain',
+                    'sorting_order': 200
+                },
+
+                'roundsCount': {
+                    'title': 'Number of rounds',
+                    'description': 'Total number of data updates made',
+                    'sorting_order': 210
+                },
+
+                'getRound': {
+                    'title': 'Get data of round',
+                    'description': 'Get data, update time and round number of n-th data update '
+                                   '(only last rounds within history size are available)',
+                    'inputs': [{
+                        'title': 'Round number',
+                        'description': 'Round number, starting from zero.',
+                    }],
+                    'payable_details': {
+                        'title': 'Ether amount (must be equal to the data price)',
+                        'description': 'This ether amount will be sent with the function call',
+                    },
+                    'sorting_order': 220
+                },
+
+                'getValueAt': {
+                    'title': 'Get data at time',
+                    'description': 'Get data which was actual at specified time, with its update time and round number',
+                    'inputs': [{
+                        'title': 'Time',
+                        'ui:widget': 'unixTime',
+                    }],
+                    'payable_details': {
+                        'title': 'Ether amount (must be equal to the data price)',
+                        'description': 'This ether amount will be sent with the function call',
+                    },
+                    'sorting_order': 230
+                },
+            })
+
+        if fields_vals.get('subscriptions') == True:
+            function_titles['updateData']['description'] += \
+                '. Final confirmation sends new data to subscribers as long as transaction gas allows: ' \
+                'set gas limit by hand, gas estimation covers no deliveries. ' \
+                'Undelivered subscribers can be served by "Continue delivery"'
+
+            function_titles.update({
+                'subscriberGas': {
+                    'title': 'Gas per subscriber',
+                    'description': 'Maximum gas which subscriber contract can spend on receiving data',
+                    'sorting_order': 300
+                },
+
+                'getSubscribersCount': {
+                    'title': 'Number of subscribers',
+                    'description': 'How many subscriber contracts receive data updates',
+                    'sorting_order': 310
+                },
+
+                'subscribers': {
+                    'title': 'Get n-th subscriber',
+                    'description': 'Returns address of n-th subscriber contract',
+                    'inputs': [{
+                        'title': 'Subscriber\'s number',
+                        'description': 'Subscriber\'s number, starting from zero.',
+                    }],
+                    'sorting_order': 320
+                },
+
+                'subscriptions': {
+                    'title': 'Subscription',
+                    'description': 'Returns owner, prepaid balance and position (starting from one, zero if not subscribed) '
+                                   'of subscriber contract',
+                    'inputs': [{
+                        'title': 'Subscriber contract address',
+                    }],
+                    'sorting_order': 330
+                },
+
+                'subscribersBalance': {
+                    'title': 'Subscribers balance',
+                    'description': 'Ether prepaid by subscribers, it can\'t be withdrawn by owners',
+                    'ui:widget': 'ethCount',
+                    'sorting_order': 340
+                },
+
+                'deliveryCursor': {
+                    'title': 'Delivery position',
+                    'description': 'Subscribers starting from this position haven\'t received last data yet',
+                    'sorting_order': 350
+                },
+
+                'subscribe': {
+                    'title': 'Subscribe',
+                    'description': 'Subscribe contract to data updates. On every update its function '
+                                   'onOracleData(data, updateTime) is called and data price is taken from prepaid ether. '
+                                   'Subscription is cancelled when prepaid ether is not enough for the next update. '
+                                   'Price is taken even if the call fails (DeliveryFailed event).',
+                    'inputs': [{
+                        'title': 'Subscriber contract address',
+                    }],
+                    'payable_details': {
+                        'title': 'Ether amount (at least the data price)',
+                        'description': 'Prepaid ether for data updates',
+                    },
+                    'sorting_order': 360
+                },
+
+                'topUp': {
+                    'title': 'Top up subscription',
+                    'description': 'Add ether to prepaid balance of subscription',
+                    'inputs': [{
+                        'title': 'Subscriber contract address',
+                    }],
+                    'payable_details': {
+                        'title': 'Ether amount',
+                        'description': 'This ether amount will be added to subscription balance',
+                    },
+                    'sorting_order': 370
+                },
+
+                'unsubscribe': {
+                    'title': 'Unsubscribe',
+                    'description': 'Cancel subscription and return its prepaid ether (only by subscription owner)',
+                    'inputs': [{
+                        'title': 'Subscriber contract address',
+                    }],
+                    'sorting_order': 380
+                },
+
+                'claimRefund': {
+                    'title': 'Claim refund',
+                    'description': 'Return ether left from subscriptions which were cancelled because of low balance',
+                    'sorting_order': 390
+                },
+
+                'deliver': {
+                    'title': 'Continue delivery',
+                    'description': 'Send last data to subscribers which haven\'t got it yet because of gas limit. '
+                                   'Delivers to as many subscribers as transaction gas limit allows.',
+                    'sorting_order': 400
+                },
+            })
+
         return {
             "result": "success",
             'function_specs': function_titles,
@@ -384,7 +620,7 @@ class Constructor(ConstructorInstance):
 // use modifiers onlyowner (just own owned) or onlymanyowners(hash), whereby the same hash must be provided by
 // some number (specified in constructor) of the set of owners (specified in the constructor, modifiable) before the
 // interior is executed.
-pragma solidity ^0.4.15;
+pragma solidity %solidity_version%;
 contract multiowned {
 	// TYPES
     // struct for the status of a pending operation.
@@ -587,6 +823,43 @@ contract multiowned {
     {
         return !(m_multiOwnedPending[_operation].ownersDone & makeOwnerBitmapBit(_owner) == 0);
     }
+    /// @notice Gets size of pending operations index, which is paginated by getPendingOperations
+    function getPendingOperationsIndexLength() public constant returns (uint) {
+        return m_multiOwnedPendingIndex.length;
+    }
+    /// @notice Gets active pending operations with their confirmation status
+    /// @param _offset first position in pending operations index
+    /// @param _limit maximum number of index positions to look through
+    /// @return operations, counts of confirmations needed and bitmaps of owners confirmed
+    // Index positions of finished operations are empty, so fewer than _limit operations could be returned.
+    // Owner getOwner(n) corresponds to 2**(n + 1) bit of ownersDone.
+    function getPendingOperations(uint _offset, uint _limit)
+        public
+        constant
+        returns (bytes32[] operations, uint[] yetNeeded, uint[] ownersDone)
+    {
+        uint end = _offset + _limit;
+        if (end < _offset || end > m_multiOwnedPendingIndex.length)
+            end = m_multiOwnedPendingIndex.length;
+        uint count = 0;
+        for (uint i = _offset; i < end; ++i) {
+            if (m_multiOwnedPendingIndex[i] != 0)
+                count++;
+        }
+        operations = new bytes32[](count);
+        yetNeeded = new uint[](count);
+        ownersDone = new uint[](count);
+        uint position = 0;
+        for (i = _offset; i < end; ++i) {
+            bytes32 operation = m_multiOwnedPendingIndex[i];
+            if (operation == 0)
+                continue;
+            operations[position] = operation;
+            yetNeeded[position] = m_multiOwnedPending[operation].yetNeeded;
+            ownersDone[position] = m_multiOwnedPending[operation].ownersDone;
+            position++;
+        }
+    }
     // INTERNAL METHODS
     function confirmAndCheck(bytes32 _operation)
         private
@@ -757,8 +1030,10 @@ contract Oracle is multiowned {
     {
         data = _data;
         lastDataUpdate = now;
+        %history_update%
         DataUpdate(lastDataUpdate);
         newNonce();
+        %subscriptions_update%
     }
 
     function withdraw(address _receiver, uint256 _amount)
@@ -766,6 +1041,7 @@ contract Oracle is multiowned {
         onlymanyowners(keccak256(msg.data))
     {
         require(_amount <= address(this).balance);
+        %withdraw_check%
         _receiver.transfer(_amount);
         Withdraw(_receiver, _amount);
     }
@@ -778,6 +1054,8 @@ contract Oracle is multiowned {
         require(msg.value == price);
         return data;
     }
+%history_code%
+%subscriptions_code%
 }
 
 contract OracleWrapper is Oracle(
@@ -785,3 +1063,228 @@ contract OracleWrapper is Oracle(
     %price%
 ) { }
     """
+
+    # language=Solidity
+    _HISTORY_TEMPLATE = """
+    struct Round {
+        %dataType% value;
+        uint256 timestamp;
+    }
+
+    uint256 public constant historyCapacity = %history_size%;
+    // total number of data updates, round n is stored in history[n % historyCapacity]
+    uint256 public roundsCount;
+
+    Round[%history_size%] internal history;
+
+    function recordRound()
+        private
+    {
+        Round storage round = history[roundsCount % historyCapacity];
+        round.value = data;
+        round.timestamp = lastDataUpdate;
+        roundsCount++;
+    }
+
+    // first round which is still kept in history
+    function oldestRound()
+        private
+        constant
+        returns (uint256)
+    {
+        return roundsCount > historyCapacity ? roundsCount - historyCapacity : 0;
+    }
+
+    function getRound(uint256 _round)
+        public
+        payable
+        returns (%dataType%, uint256, uint256)
+    {
+        require(msg.value == price);
+        require(_round < roundsCount && _round >= oldestRound());
+
+        Round storage round = history[_round % historyCapacity];
+        return (round.value, round.timestamp, _round);
+    }
+
+    // binary search of the last round updated not later than _ts, O(log historyCapacity)
+    function getValueAt(uint256 _ts)
+        public
+        payable
+        returns (%dataType%, uint256, uint256)
+    {
+        require(msg.value == price);
+        require(roundsCount > 0);
+
+        uint256 low = oldestRound();
+        uint256 high = roundsCount - 1;
+        require(history[low % historyCapacity].timestamp <= _ts);
+
+        while (low < high) {
+            uint256 mid = (low + high + 1) / 2;
+            if (history[mid % historyCapacity].timestamp <= _ts)
+                low = mid;
+            else
+                high = mid - 1;
+        }
+
+        Round storage round = history[low % historyCapacity];
+        return (round.value, round.timestamp, low);
+    }
+"""
+
+    # language=Solidity
+    _SUBSCRIPTIONS_TEMPLATE = """
+    event Subscribed (address callback, address owner);
+    event Unsubscribed (address callback);
+    event DeliveryFailed (address callback);
+
+    struct Subscription {
+        address owner;
+        uint256 balance;
+        // position in subscribers plus one, zero for inactive subscription
+        uint256 index;
+    }
+
+    // subscriber contracts must implement onOracleData(%dataType% _data, uint256 _ts)
+    bytes4 constant c_callbackSelector = bytes4(keccak256("onOracleData(%dataType%,uint256)"));
+    // gas left for the rest of transaction when delivery stops
+    uint256 constant c_deliveryGasReserve = 50000;
+
+    uint256 public constant subscriberGas = %subscriber_gas%;
+
+    address[] public subscribers;
+    mapping(address => Subscription) public subscriptions;
+    // ether left from subscriptions cancelled because of low balance
+    mapping(address => uint256) internal refunds;
+    // prepaid and refundable ether, can't be withdrawn by owners
+    uint256 public subscribersBalance;
+    // subscribers starting from deliveryCursor haven't got the last data yet
+    uint256 public deliveryCursor;
+
+    function getSubscribersCount()
+        public
+        constant
+        returns (uint256)
+    {
+        return subscribers.length;
+    }
+
+    function subscribe(address _callback)
+        public
+        payable
+    {
+        require(_callback != 0 && subscriptions[_callback].index == 0);
+        require(msg.value >= price);
+
+        // new subscriber doesn't need data which was already delivered to everyone
+        if (deliveryCursor == subscribers.length)
+            deliveryCursor++;
+        subscribers.push(_callback);
+        subscriptions[_callback] = Subscription(msg.sender, msg.value, subscribers.length);
+        subscribersBalance += msg.value;
+        Subscribed(_callback, msg.sender);
+    }
+
+    function topUp(address _callback)
+        public
+        payable
+    {
+        require(subscriptions[_callback].index != 0);
+
+        subscriptions[_callback].balance += msg.value;
+        subscribersBalance += msg.value;
+    }
+
+    function unsubscribe(address _callback)
+        public
+    {
+        require(subscriptions[_callback].index != 0 && subscriptions[_callback].owner == msg.sender);
+
+        uint256 amount = subscriptions[_callback].balance;
+        subscribersBalance -= amount;
+        removeSubscriber(_callback);
+        msg.sender.transfer(amount);
+    }
+
+    function claimRefund()
+        public
+    {
+        uint256 amount = refunds[msg.sender];
+        require(amount > 0);
+
+        refunds[msg.sender] = 0;
+        subscribersBalance -= amount;
+        msg.sender.transfer(amount);
+    }
+
+    function deliver()
+        public
+    {
+        require(deliveryCursor < subscribers.length);
+        bytes memory payload = abi.encodeWithSelector(c_callbackSelector, data, lastDataUpdate);
+        // otherwise call with estimated gas succeeds without delivering anything
+        require(gasleft() >= subscriberGas + c_deliveryGasReserve);
+        deliverBatch(payload);
+    }
+
+    function startDelivery()
+        private
+    {
+        deliveryCursor = 0;
+        // data is not encoded when there is nobody to deliver it to
+        if (deliveryCursor >= subscribers.length)
+            return;
+        deliverBatch(abi.encodeWithSelector(c_callbackSelector, data, lastDataUpdate));
+    }
+
+    // Sends data to subscribers while there is enough gas, the rest can be served by deliver()
+    function deliverBatch(bytes memory payload)
+        private
+    {
+        while (deliveryCursor < subscribers.length && gasleft() >= subscriberGas + c_deliveryGasReserve) {
+            address callback = subscribers[deliveryCursor];
+            Subscription storage subscription = subscriptions[callback];
+
+            if (subscription.balance < price) {
+                refunds[subscription.owner] += subscription.balance;
+                removeSubscriber(callback);
+                continue;
+            }
+
+            subscription.balance -= price;
+            subscribersBalance -= price;
+            // cursor is moved before the call, so reentrant (un)subscriptions keep it consistent
+            deliveryCursor++;
+            if (!callback.call.gas(subscriberGas)(payload))
+                DeliveryFailed(callback);
+        }
+    }
+
+    // Removes subscriber keeping subscribers before deliveryCursor delivered and the rest undelivered
+    function removeSubscriber(address _callback)
+        private
+    {
+        uint256 position = subscriptions[_callback].index - 1;
+        delete subscriptions[_callback];
+
+        if (position < deliveryCursor) {
+            deliveryCursor--;
+            moveSubscriber(deliveryCursor, position);
+            position = deliveryCursor;
+        }
+        moveSubscriber(subscribers.length - 1, position);
+        subscribers.length--;
+        Unsubscribed(_callback);
+    }
+
+    function moveSubscriber(uint256 _from, uint256 _to)
+        private
+    {
+        if (_from == _to)
+            return;
+
+        subscribers[_to] = subscribers[_from];
+        subscriptions[subscribers[_to]].index = _to + 1;
+    }
+"""
@@ -0,0 +1,14 @@
+def data_type(fields_vals):
+    """
+    Solidity type of the oracle data for construct fields.
+    """
+    result = fields_vals['dataType']
+    if result in ['uint', 'int']:
+        result += str(fields_vals['integerSize'])
+    elif result == 'bytes':
+        result += str(fields_vals['bytesSize'])
+
+    if 'isArray' in fields_vals and fields_vals['isArray'] == True:
+        result += '[]'
+
+    return result
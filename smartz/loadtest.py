@@ -0,0 +1,313 @@
+"""
+Load-test harness for generated oracles.
+
+Compiles construct output, deploys it on an in-process EVM (eth-tester + py-evm) and
+replays a workload of consumers calling getData and owners confirming updateData,
+setPrice and withdraw. Transactions of one simulated block are sent before the block
+is mined, so concurrent actors race against each other the same way they do on a
+real network (e.g. two owners confirming an update with the same nonce).
+
+Requires web3, eth-tester[py-evm] and py-solc-x, which are not needed by the constructor itself.
+"""
+
+import multiprocessing
+import random
+import time
+from collections import defaultdict
+
+from smartz.pending import pending_operations
+
+
+SOLC_VERSION = '0.4.24'
+BLOCK_GAS_LIMIT = 100000000
+DEPLOY_GAS = 8000000
+TX_GAS = 3000000
+
+
+class Workload(object):
+    """
+    Traffic description, probabilities are per actor per block.
+    """
+
+    def __init__(self, blocks=100, consumers=5, read_probability=0.5, update_every=5,
+                 confirm_probability=0.7, disagreement_probability=0.0,
+                 price_change_probability=0.02, withdraw_probability=0.02, seed=0):
+        self.blocks = blocks
+        self.consumers = consumers
+        self.read_probability = read_probability
+        # a new data update round is started by owners every update_every blocks
+        self.update_every = update_every
+        self.confirm_probability = confirm_probability
+        # chance that an owner confirms its own value instead of the agreed one
+        self.disagreement_probability = disagreement_probability
+        self.price_change_probability = price_change_probability
+        self.withdraw_probability = withdraw_probability
+        self.seed = seed
+
+
+class LocalChain(object):
+    """
+    In-process EVM with funded unlocked accounts and manual mining.
+    """
+
+    def __init__(self, num_accounts=10):
+        from eth_tester import EthereumTester, PyEVMBackend
+        from web3 import Web3, EthereumTesterProvider
+
+        backend = PyEVMBackend(
+            genesis_parameters=PyEVMBackend.generate_genesis_params(overrides={'gas_limit': BLOCK_GAS_LIMIT}),
+            genesis_state=PyEVMBackend.generate_genesis_state(num_accounts=num_accounts),
+        )
+        self.tester = EthereumTester(backend, auto_mine_transactions=False)
+        self.web3 = Web3(EthereumTesterProvider(self.tester))
+        self.accounts = list(self.web3.eth.accounts)
+
+    def compile(self, source, contract_name):
+        import solcx
+
+        if SOLC_VERSION not in [str(version) for version in solcx.get_installed_solc_versions()]:
+            solcx.install_solc(SOLC_VERSION)
+        compiled = solcx.compile_source(source, output_values=['abi', 'bin'], solc_version=SOLC_VERSION)
+        interface = compiled['<stdin>:' + contract_name]
+        return interface['abi'], interface['bin']
+
+    def deploy(self, construct_result, sender=None):
+        abi, bytecode = self.compile(construct_result['source'], construct_result['contract_name'])
+        factory = self.web3.eth.contract(abi=abi, bytecode=bytecode)
+        tx_hash = factory.constructor().transact({'from': sender or self.accounts[0], 'gas': DEPLOY_GAS})
+        self.mine()
+        receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+        assert receipt['status'] == 1, 'Deployment of {} failed'.format(construct_result['contract_name'])
+        return self.web3.eth.contract(address=receipt['contractAddress'], abi=abi)
+
+    def send(self, function_call, sender, value=0, gas=TX_GAS):
+        """
+        Queues transaction into the next block, returns its hash or None if it was rejected right away.
+        Only one transaction of a sender may be queued per block.
+        """
+        from eth_tester.exceptions import TransactionFailed, ValidationError as TesterValidationError
+        from eth_utils import ValidationError
+        from web3.exceptions import ContractLogicError
+
+        try:
+            return function_call.transact({'from': sender, 'value': value, 'gas': gas})
+        except (ValidationError, TesterValidationError, TransactionFailed, ContractLogicError):
+            # rejected by the EVM (e.g. balance, gas limit) or failed before being queued
+            return None
+
+    def mine(self):
+        self.tester.mine_blocks(1)
+
+    def receipt(self, tx_hash):
+        """
+        Receipt of a mined transaction, None if the transaction was replaced or dropped.
+        """
+        from web3.exceptions import TransactionNotFound
+
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+
+class LoadTest(object):
+
+    def __init__(self, chain, construct_result, workload, owners):
+        """
+        :param owners: addresses of chain accounts which were passed to construct as owners
+        """
+        self.chain = chain
+        self.workload = workload
+        self.owners = list(owners)
+        self.consumers = [acc for acc in chain.accounts if acc not in self.owners][:workload.consumers]
+        if len(self.consumers) < workload.consumers:
+            raise ValueError('Not enough chain accounts for {} consumers'.format(workload.consumers))
+
+        self.oracle = chain.deploy(construct_result)
+        self._data_type = next(f for f in self.oracle.abi if f.get('name') == 'updateData')['inputs'][0]['type']
+        self._random = random.Random(workload.seed)
+
+    def run(self):
+        w = self.workload
+        from web3.logs import DISCARD
+
+        oracle = self.oracle.functions
+
+        gas = defaultdict(list)
+        failed = defaultdict(int)
+        sent = defaultdict(int)
+        nonce_guarded = 0
+        nonce_failures = 0
+        pending_history = []
+        sync_time = 0.0
+
+        update_round = None
+        price_round = None
+
+        started_at = time.time()
+        for block in range(w.blocks):
+            nonce = oracle.nonce().call()
+            price = oracle.price().call()
+            # (op name, tx hash, nonce the tx was sent with)
+            txs = []
+
+            # rounds are over when they were executed or when every owner has already voted
+            # and the quorum still was not reached (owners disagreed)
+            if update_round is not None and self._round_is_over(update_round, nonce):
+                update_round = None
+            if price_round is not None and self._round_is_over(price_round, nonce):
+                price_round = None
+            if update_round is None and block % w.update_every == 0:
+                update_round = {'nonce': nonce, 'value': self._sample_value(), 'confirmed': set()}
+            if price_round is None and self._random.random() < w.price_change_probability:
+                price_round = {'nonce': nonce, 'value': price + 1, 'confirmed': set()}
+
+            for consumer in self.consumers:
+                if self._random.random() < w.read_probability:
+                    txs.append(('getData', self.chain.send(oracle.getData(), consumer, price), None))
+
+            # the local chain accepts only one transaction per sender in a block,
+            # owners which are busy with a withdrawal confirm updates later
+            busy = set()
+            if self._random.random() < w.withdraw_probability:
+                required = oracle.m_multiOwnedRequired().call()
+                receiver = self._random.choice(self.owners)
+                for owner in self._random.sample(self.owners, required):
+                    busy.add(owner)
+                    txs.append(('withdraw', self.chain.send(oracle.withdraw(receiver, price), owner), None))
+
+            for owner in self.owners:
+                for name, current in (('updateData', update_round), ('setPrice', price_round)):
+                    if owner in busy:
+                        break
+                    if current is None or owner in current['confirmed']:
+                        continue
+                    if self._random.random() >= w.confirm_probability:
+                        continue
+
+                    value = current['value']
+                    if name == 'updateData' and self._random.random() < w.disagreement_probability:
+                        value = self._sample_value()
+                    current['confirmed'].add(owner)
+                    busy.add(owner)
+                    call = getattr(oracle, name)(value, current['nonce'])
+                    txs.append((name, self.chain.send(call, owner), current['nonce']))
+
+            self.chain.mine()
+            nonce_after = oracle.nonce().call()
+
+            for name, tx_hash, tx_nonce in txs:
+                sent[name] += 1
+                if tx_nonce is not None:
+                    nonce_guarded += 1
+
+                receipt = self.chain.receipt(tx_hash) if tx_hash is not None else None
+                if receipt is None or receipt['status'] != 1:
+                    failed[name] += 1
+                    if tx_nonce is not None and tx_nonce < nonce_after:
+                        nonce_failures += 1
+                    continue
+
+                if name == 'getData':
+                    gas[name].append(receipt['gasUsed'])
+                    continue
+
+                final = self.oracle.events.FinalConfirmation().process_receipt(receipt, errors=DISCARD)
+                gas[name + (':final' if final else ':confirm')].append(receipt['gasUsed'])
+
+            # read from the contract, which drops all pending operations by itself from time to time
+            sync_started_at = time.time()
+            pending_history.append(len(pending_operations(self.oracle)))
+            sync_time += time.time() - sync_started_at
+
+        elapsed = time.time() - started_at - sync_time
+        succeeded = sum(len(samples) for samples in gas.values())
+        return {
+            'blocks': w.blocks,
+            'elapsed': elapsed,
+            'transactions': sum(sent.values()),
+            'succeeded': succeeded,
+            'throughput': {
+                'per_second': succeeded / elapsed if elapsed else None,
+                'per_block': succeeded / float(w.blocks) if w.blocks else None,
+            },
+            'gas': {name: _summary(samples) for name, samples in gas.items()},
+            'failed': dict(failed),
+            'failed_nonce_rate': nonce_failures / float(nonce_guarded) if nonce_guarded else 0.0,
+            'pending_operations': {
+                'final': pending_history[-1] if pending_history else 0,
+                'max': max(pending_history) if pending_history else 0,
+                'growth_per_block': pending_history[-1] / float(w.blocks) if pending_history else 0.0,
+            },
+        }
+
+    def _round_is_over(self, current, nonce):
+        return current['nonce'] < nonce or len(current['confirmed']) == len(self.owners)
+
+    def _sample_value(self):
+        return sample_value(self._data_type, self._random)
+
+
+def sample_value(abi_type, rnd, array_length=8):
+    """
+    Random value of a type which can be generated by the constructor.
+    """
+    if abi_type.endswith('[]'):
+        return [sample_value(abi_type[:-2], rnd) for _ in range(array_length)]
+    if abi_type.startswith('uint'):
+        return rnd.getrandbits(int(abi_type[4:]))
+    if abi_type.startswith('int'):
+        bits = int(abi_type[3:])
+        return rnd.getrandbits(bits) - 2 ** (bits - 1)
+    if abi_type == 'address':
+        from web3 import Web3
+        return Web3.to_checksum_address('0x%040x' % rnd.getrandbits(160))
+    if abi_type.startswith('bytes'):
+        return bytes(bytearray(rnd.getrandbits(8) for _ in range(int(abi_type[5:]))))
+    if abi_type == 'string':
+        return 'value %d' % rnd.getrandbits(32)
+    raise ValueError('Unsupported type {}'.format(abi_type))
+
+
+def run_load_test(constructor, fields_vals, workload):
+    """
+    Constructs an oracle and load-tests it on a fresh local chain.
+
+    Owner addresses of fields_vals are replaced with local accounts (the harness has to sign
+    their transactions), only their number matters.
+    """
+    chain = LocalChain(num_accounts=len(fields_vals['owners']) + workload.consumers)
+    owners = chain.accounts[:len(fields_vals['owners'])]
+
+    result = constructor.construct(dict(fields_vals, owners=owners))
+    if result['result'] != 'success':
+        raise ValueError(result['error_descr'])
+
+    return LoadTest(chain, result, workload, owners).run()
+
+
+def _run_variant(variant):
+    from smartz.constructor import Constructor
+    fields_vals, workload = variant
+    return run_load_test(Constructor(), fields_vals, workload)
+
+
+def compare(variants, processes=None):
+    """
+    Runs load tests of several (fields_vals, workload) variants in parallel, one chain per process.
+    """
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        return pool.map(_run_variant, variants)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _summary(samples):
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / float(len(samples)),
+        'min': min(samples),
+        'max': max(samples),
+    }
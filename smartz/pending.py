@@ -0,0 +1,46 @@
+"""
+Confirmation status of pending multisig operations of a deployed oracle.
+
+Reads all pending operations with a few getPendingOperations calls instead of
+calling hasConfirmed for each operation and owner.
+"""
+
+
+def owners_from_bitmap(owners_done, owners):
+    """
+    Owners which confirmed an operation.
+
+    :param owners_done: ownersDone bitmap, owner n corresponds to 2**(n + 1) bit
+    :param owners: result of getOwners()
+    """
+    return [owner for idx, owner in enumerate(owners) if owners_done & (1 << (idx + 1))]
+
+
+def pending_operations(oracle, page_size=100, block_identifier=None):
+    """
+    All active pending operations of an oracle.
+
+    :param oracle: web3 contract object of a generated oracle
+    :param page_size: number of pending operations index positions read in one call
+    :return: list of dicts with operation, yet_needed and confirmed_by (list of owners)
+    """
+    if block_identifier is None:
+        # every page must be read from the same state
+        block_identifier = oracle.w3.eth.block_number
+
+    functions = oracle.functions
+    owners = functions.getOwners().call(block_identifier=block_identifier)
+    index_length = functions.getPendingOperationsIndexLength().call(block_identifier=block_identifier)
+
+    result = []
+    for offset in range(0, index_length, page_size):
+        operations, yet_needed, owners_done = \
+            functions.getPendingOperations(offset, page_size).call(block_identifier=block_identifier)
+        for operation, needed, done in zip(operations, yet_needed, owners_done):
+            result.append({
+                'operation': operation,
+                'yet_needed': needed,
+                'confirmed_by': owners_from_bitmap(done, owners),
+            })
+
+    return result
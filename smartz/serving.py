@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+
+
+def _request_key(fields_vals):
+    return json.dumps(fields_vals, sort_keys=True, separators=(',', ':'))
+
+
+class ConstructorService(object):
+    """
+    Single-flight serving layer for construct requests.
+
+    work is the expensive per-request step, e.g. construct followed by compilation of the
+    source, by default Constructor.construct. Identical concurrent requests are collapsed
+    into one call of work, made in the thread of the first caller, the others wait for its
+    result. Compilation runs solc in a subprocess, so computations in threads don't serialize
+    on the GIL. construct itself is a cheap string substitution, much cheaper than passing
+    a request to another process, so there is no process pool.
+
+    At most max_concurrent distinct computations run at once: a caller which can't get a slot
+    within queue_timeout seconds gets an error result instead of piling up behind the others.
+    Waiting for a slot is counted in wait time. Callers of coalesced requests wait at most
+    timeout seconds (the computation itself can't be interrupted and keeps its slot until done).
+    Coalesced callers get the same result object, which must not be modified.
+    """
+
+    def __init__(self, work=None, max_concurrent=64, queue_timeout=1.0, timeout=30.0, stats_window=1000):
+        if work is None:
+            from smartz.constructor import Constructor
+            work = Constructor().construct
+
+        self._work = work
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._queue_timeout = queue_timeout
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+        self._queue_depth = 0
+        self._requests = 0
+        self._coalesced = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_times = deque(maxlen=stats_window)
+        self._latencies = deque(maxlen=stats_window)
+
+    def construct(self, fields_vals):
+        arrived_at = time.time()
+        key = _request_key(fields_vals)
+
+        with self._lock:
+            self._requests += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self._queue_depth += 1
+            else:
+                self._coalesced += 1
+
+        if leader:
+            result = self._compute(key, fields_vals, future, arrived_at)
+        else:
+            try:
+                result = future.result(self._timeout)
+            except TimeoutError:
+                with self._lock:
+                    self._timed_out += 1
+                    self._latencies.append(time.time() - arrived_at)
+                return {
+                    "result": "error",
+                    "error_descr": "Constructor did not respond in time, try again later"
+                }
+
+        with self._lock:
+            self._latencies.append(time.time() - arrived_at)
+        return result
+
+    def _compute(self, key, fields_vals, future, arrived_at):
+        if not self._slots.acquire(timeout=self._queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            result = {
+                "result": "error",
+                "error_descr": "Constructor is overloaded, try again later"
+            }
+            self._finish(key, future, result=result)
+            return result
+
+        with self._lock:
+            self._wait_times.append(time.time() - arrived_at)
+        try:
+            result = self._work(fields_vals)
+        except BaseException as exc:
+            self._finish(key, future, exception=exc)
+            raise
+        finally:
+            self._slots.release()
+
+        self._finish(key, future, result=result)
+        return result
+
+    def _finish(self, key, future, result=None, exception=None):
+        with self._lock:
+            del self._in_flight[key]
+            self._queue_depth -= 1
+
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue_depth,
+                'requests': self._requests,
+                'coalesced': self._coalesced,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'wait_time': percentiles(self._wait_times),
+                'latency': percentiles(self._latencies),
+            }
+
+
+def percentiles(samples):
+    if not samples:
+        return {'p50': None, 'p99': None, 'max': None}
+
+    ordered = sorted(samples)
+    return {
+        'p50': ordered[int(0.50 * (len(ordered) - 1))],
+        'p99': ordered[int(0.99 * (len(ordered) - 1))],
+        'max': ordered[-1],
+    }
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+PRICE = 10 ** 15
+
+
+@pytest.fixture
+def chain():
+    pytest.importorskip('eth_tester')
+    pytest.importorskip('web3')
+    solcx = pytest.importorskip('solcx')
+    from smartz.loadtest import SOLC_VERSION, LocalChain
+
+    try:
+        solcx.install_solc(SOLC_VERSION)
+    except Exception:
+        pytest.skip('solc {} is not available'.format(SOLC_VERSION))
+
+    return LocalChain(num_accounts=20)
+
+
+@pytest.fixture
+def constructor():
+    pytest.importorskip('smartz.api.constructor_engine')
+    from smartz.constructor import Constructor
+    return Constructor()
+
+
+@pytest.fixture
+def deploy_oracle(chain, constructor):
+    """
+    Deploys oracle with uint256 data owned by the first chain accounts.
+    """
+    def deploy(owners_count=2, **fields):
+        fields_vals = {
+            'dataType': 'uint', 'integerSize': 256, 'isArray': False, 'price': PRICE,
+            'owners': chain.accounts[:owners_count], 'signs_count': 2,
+        }
+        fields_vals.update(fields)
+        result = constructor.construct(fields_vals)
+        assert result['result'] == 'success'
+        return chain.deploy(result)
+
+    return deploy
+
+
+@pytest.fixture
+def execute(chain):
+    """
+    Sends transactions of different senders into one block, returns their receipts.
+
+    Each transaction is (function call, sender) or (function call, sender, ether value).
+    """
+    def execute(*txs, **kwargs):
+        if 'timestamp' in kwargs:
+            chain.tester.time_travel(kwargs['timestamp'])
+        hashes = [chain.send(*tx, gas=kwargs.get('gas', 3000000)) for tx in txs]
+        chain.mine()
+        receipts = [chain.receipt(tx_hash) for tx_hash in hashes]
+        return receipts[0] if len(receipts) == 1 else receipts
+
+    return execute
+
+
+@pytest.fixture
+def update_data(chain, execute):
+    """
+    Updates data of oracle by the first two owners, returns receipt of the final confirmation.
+    """
+    def update(oracle, value, **kwargs):
+        nonce = oracle.functions.nonce().call()
+        call = oracle.functions.updateData(value, nonce)
+        receipts = execute((call, chain.accounts[0]), (call, chain.accounts[1]), **kwargs)
+        assert all(receipt['status'] == 1 for receipt in receipts)
+        return receipts[1]
+
+    return update
+
+
+def latest_timestamp(chain):
+    return chain.web3.eth.get_block('latest')['timestamp']
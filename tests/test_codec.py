@@ -0,0 +1,151 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+eth_abi = pytest.importorskip('eth_abi')
+keccak = pytest.importorskip('eth_hash.auto').keccak
+
+from smartz.codec import OracleCodec
+
+
+def normalize(codec, value):
+    if isinstance(value, np.ndarray):
+        if codec.kind == 'address':
+            return ['0x' + address.tobytes().hex() for address in value]
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [normalize(codec, item) for item in value]
+    if isinstance(value, str) and value.startswith('0x'):
+        return value.lower()
+    return value
+
+
+def check_round_trip(data_type, value, encoded_value=None):
+    codec = OracleCodec(data_type)
+
+    calldata = codec.encode_update(value if encoded_value is None else encoded_value, 7)
+    assert calldata == codec.selector + eth_abi.encode([data_type, 'uint256'], [value, 7])
+
+    return_data = eth_abi.encode([data_type], [value])
+    assert normalize(codec, codec.decode_data(return_data)) == \
+        normalize(codec, eth_abi.decode([data_type], return_data)[0])
+
+
+def random_ints(bits, signed, count=50):
+    rnd = random.Random(bits)
+    shift = 2 ** (bits - 1) if signed else 0
+    values = [rnd.getrandbits(bits) - shift for _ in range(count)]
+    return values + [-shift, 2 ** bits - 1 - shift]
+
+
+@pytest.mark.parametrize('data_type', ['int8', 'uint8', 'int24', 'uint24', 'int64', 'uint64', 'int256', 'uint256'])
+def test_integers(data_type):
+    signed = not data_type.startswith('u')
+    values = random_ints(int(data_type.lstrip('uint')), signed)
+
+    check_round_trip(data_type + '[]', values)
+    for value in values[-2:]:
+        check_round_trip(data_type, value)
+
+
+def test_string():
+    check_round_trip('string', '')
+    check_round_trip('string', 'héllo ' * 20)
+
+
+def test_bytes():
+    check_round_trip('bytes1', b'\x01')
+    check_round_trip('bytes7', b'abcdefg')
+    check_round_trip('bytes32', bytes(range(32)))
+
+
+def test_addresses():
+    rnd = random.Random(0)
+    addresses = ['0x%040x' % rnd.getrandbits(160) for _ in range(20)]
+
+    check_round_trip('address', addresses[0])
+    check_round_trip('address[]', addresses)
+    packed = b''.join(bytes.fromhex(address[2:]) for address in addresses)
+    check_round_trip('address[]', addresses, memoryview(packed))
+
+
+@pytest.mark.parametrize('data_type', ['uint64[]', 'int8[]', 'uint256[]', 'address[]'])
+def test_empty_arrays(data_type):
+    check_round_trip(data_type, [])
+
+
+def test_memoryview_input():
+    values = np.arange(-50, 50, dtype=np.int32)
+    check_round_trip('int32[]', values.tolist(), memoryview(values.tobytes()))
+    check_round_trip('int32[]', values.tolist(), values)
+
+
+@pytest.mark.parametrize('data_type', ['uint256[]', 'int256[]', 'int128[]', 'uint72[]'])
+def test_wide_integers_memoryview_input(data_type):
+    bits = int(data_type[:-2].lstrip('uint'))
+    signed = not data_type.startswith('u')
+    values = random_ints(bits, signed)
+    words = b''.join((v % 2 ** 256).to_bytes(32, 'big') for v in values)
+    check_round_trip(data_type, values, memoryview(words))
+
+
+def test_wide_integers_buffer_is_read_as_words():
+    codec = OracleCodec('uint256[]')
+    calldata = codec.encode_update(memoryview((5).to_bytes(32, 'big') * 2), 0)
+    assert calldata == codec.selector + eth_abi.encode(['uint256[]', 'uint256'], [[5, 5], 0])
+
+    with pytest.raises(ValueError):
+        OracleCodec('uint256[]').encode_update(bytes(33), 0)
+
+
+@pytest.mark.parametrize('data_type, value', [
+    ('uint8[]', [256]),
+    ('uint8[]', [-1]),
+    ('int8[]', [128]),
+    ('int8[]', [-129]),
+    ('uint64[]', [2 ** 64]),
+    ('uint256[]', [2 ** 256]),
+    ('int256', -2 ** 255 - 1),
+    ('bytes4', b'abcde'),
+    ('bytes4', 5),
+    ('int128[]', memoryview((2 ** 127).to_bytes(32, 'big'))),
+    ('uint128[]', memoryview((2 ** 128).to_bytes(32, 'big'))),
+])
+def test_out_of_range(data_type, value):
+    with pytest.raises(ValueError):
+        OracleCodec(data_type).encode_update(value, 0)
+
+
+def test_decode_out_of_range():
+    return_data = eth_abi.encode(['uint256[]'], [[1, 256]])
+    with pytest.raises(ValueError):
+        OracleCodec('uint8[]').decode_data(return_data)
+
+
+@pytest.mark.parametrize('data_type, encoded_type, value', [
+    ('int128', 'int256', 2 ** 200),
+    ('int128', 'int256', -2 ** 127 - 1),
+    ('uint128[]', 'uint256[]', [1, 2 ** 128]),
+    ('int72[]', 'int256[]', [-2 ** 71, 2 ** 71]),
+])
+def test_decode_wide_out_of_range(data_type, encoded_type, value):
+    with pytest.raises(ValueError):
+        OracleCodec(data_type).decode_data(eth_abi.encode([encoded_type], [value]))
+
+
+def test_float_array_rejected():
+    with pytest.raises(ValueError):
+        OracleCodec('uint64[]').encode_update(np.array([1.5, 2.0]), 0)
+
+
+@pytest.mark.parametrize('data_type', ['bytes4[]', 'string[]', 'bool', 'fixed128x18'])
+def test_unsupported_types(data_type):
+    with pytest.raises(ValueError):
+        OracleCodec(data_type)
+
+
+def test_from_fields():
+    codec = OracleCodec.from_fields({'dataType': 'int', 'integerSize': 64, 'isArray': True})
+    assert codec.data_type == 'int64[]'
+    assert codec.selector == keccak(b'updateData(int64[],uint256)')[:4]
@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import PRICE, latest_timestamp
+
+
+def get_round(oracle, round_number):
+    return list(oracle.functions.getRound(round_number).call({'value': PRICE}))
+
+
+def get_value_at(oracle, ts):
+    return list(oracle.functions.getValueAt(ts).call({'value': PRICE}))
+
+
+def test_get_round_before_and_after_wrap(chain, deploy_oracle, update_data):
+    oracle = deploy_oracle(historySize=3)
+
+    for value in (100, 101, 102):
+        update_data(oracle, value)
+    assert [get_round(oracle, n)[0] for n in range(3)] == [100, 101, 102]
+    with pytest.raises(Exception):
+        get_round(oracle, 3)
+
+    for value in (103, 104):
+        update_data(oracle, value)
+    assert oracle.functions.roundsCount().call() == 5
+    with pytest.raises(Exception):
+        get_round(oracle, 1)
+    assert get_round(oracle, 2)[0::2] == [102, 2]
+    assert get_round(oracle, 4)[0::2] == [104, 4]
+    with pytest.raises(Exception):
+        get_round(oracle, 5)
+
+
+def test_get_round_requires_price(chain, deploy_oracle, update_data):
+    oracle = deploy_oracle(historySize=3)
+    update_data(oracle, 100)
+
+    with pytest.raises(Exception):
+        oracle.functions.getRound(0).call({'value': PRICE - 1})
+
+
+def test_get_value_at(chain, deploy_oracle, update_data):
+    oracle = deploy_oracle(historySize=3)
+    start = latest_timestamp(chain)
+
+    for idx, value in enumerate((100, 101, 102, 103)):
+        update_data(oracle, value, timestamp=start + 100 * (idx + 1))
+
+    # round 0 was overwritten, rounds 1..3 were updated at start + 200, 300, 400
+    assert get_value_at(oracle, start + 200) == [101, start + 200, 1]
+    assert get_value_at(oracle, start + 399) == [102, start + 300, 2]
+    assert get_value_at(oracle, start + 1000) == [103, start + 400, 3]
+    with pytest.raises(Exception):
+        get_value_at(oracle, start + 199)
+
+
+def test_get_value_at_same_block(chain, deploy_oracle, execute):
+    oracle = deploy_oracle(owners_count=4, historySize=5)
+    owners = chain.accounts[:4]
+
+    # two updates confirmed by different owners in one block share the timestamp
+    first = oracle.functions.updateData(100, 0)
+    second = oracle.functions.updateData(101, 1)
+    receipts = execute((first, owners[0]), (first, owners[1]), (second, owners[2]), (second, owners[3]))
+    assert all(receipt['status'] == 1 for receipt in receipts)
+
+    ts = latest_timestamp(chain)
+    assert get_value_at(oracle, ts) == [101, ts, 1]
+
+
+def test_history_size_one(chain, deploy_oracle, update_data):
+    oracle = deploy_oracle(historySize=1)
+    start = latest_timestamp(chain)
+
+    with pytest.raises(Exception):
+        get_value_at(oracle, start)
+
+    for idx, value in enumerate((100, 101, 102)):
+        update_data(oracle, value, timestamp=start + 100 * (idx + 1))
+
+    assert get_round(oracle, 2) == [102, start + 300, 2]
+    with pytest.raises(Exception):
+        get_round(oracle, 1)
+    assert get_value_at(oracle, start + 300) == [102, start + 300, 2]
+    with pytest.raises(Exception):
+        get_value_at(oracle, start + 299)
@@ -0,0 +1,24 @@
+from conftest import PRICE
+
+from smartz.loadtest import LoadTest, Workload
+
+
+def test_smoke(chain, constructor):
+    owners = chain.accounts[:3]
+    result = constructor.construct({
+        'dataType': 'uint', 'integerSize': 256, 'isArray': False, 'price': PRICE,
+        'owners': owners, 'signs_count': 2,
+    })
+    assert result['result'] == 'success'
+
+    workload = Workload(blocks=10, consumers=3, read_probability=1.0, confirm_probability=1.0)
+    report = LoadTest(chain, result, workload, owners).run()
+
+    assert set(report) == {
+        'blocks', 'elapsed', 'transactions', 'succeeded', 'throughput', 'gas', 'failed',
+        'failed_nonce_rate', 'pending_operations',
+    }
+    assert report['blocks'] == 10
+    assert report['gas']['getData']['count'] == 30
+    assert report['gas']['updateData:final']['count'] >= 2
+    assert report['succeeded'] <= report['transactions']
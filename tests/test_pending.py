@@ -0,0 +1,56 @@
+from conftest import PRICE
+
+from smartz.pending import owners_from_bitmap, pending_operations
+
+
+OWNERS = ['0x%040x' % (idx + 1) for idx in range(4)]
+
+
+def page(oracle, offset, limit):
+    return [list(values) for values in oracle.functions.getPendingOperations(offset, limit).call()]
+
+
+def test_owners_from_bitmap():
+    assert owners_from_bitmap(0, OWNERS) == []
+    # owner n corresponds to 2**(n + 1), the lowest bit is unused
+    assert owners_from_bitmap(1, OWNERS) == []
+    assert owners_from_bitmap(2, OWNERS) == OWNERS[:1]
+    assert owners_from_bitmap(2 ** 4, OWNERS) == OWNERS[3:]
+    assert owners_from_bitmap(2 ** 1 + 2 ** 3 + 2 ** 4, OWNERS) == [OWNERS[0], OWNERS[2], OWNERS[3]]
+    # bits of nonexistent owners are ignored
+    assert owners_from_bitmap(2 ** 5, OWNERS) == []
+
+
+def test_pending_operations(chain, deploy_oracle, execute):
+    from web3.logs import DISCARD
+
+    oracle = deploy_oracle(owners_count=4, signs_count=3)
+    owners = chain.accounts[:4]
+    nonce = oracle.functions.nonce().call()
+    set_price = oracle.functions.setPrice(2 * PRICE, nonce)
+    first, second, third = [oracle.functions.updateData(value, nonce) for value in (1, 2, 3)]
+
+    receipts = execute((set_price, owners[2]), (first, owners[0]), (second, owners[1]), (third, owners[3]))
+    operations = [
+        oracle.events.Confirmation().process_receipt(receipt, errors=DISCARD)[0]['args']['operation']
+        for receipt in receipts
+    ]
+    execute((set_price, owners[3]), (second, owners[2]))
+    # the finished price change leaves a hole at the start of the index
+    execute((set_price, owners[1]))
+    assert oracle.functions.price().call() == 2 * PRICE
+    assert oracle.functions.getPendingOperationsIndexLength().call() == 4
+
+    expected = [
+        {'operation': operations[1], 'yet_needed': 2, 'confirmed_by': [owners[0]]},
+        {'operation': operations[2], 'yet_needed': 1, 'confirmed_by': [owners[1], owners[2]]},
+        {'operation': operations[3], 'yet_needed': 2, 'confirmed_by': [owners[3]]},
+    ]
+    for page_size in (1, 3, 4, 100):
+        assert pending_operations(oracle, page_size=page_size) == expected
+
+    assert page(oracle, 0, 2) == [[operations[1]], [2], [2]]
+    assert page(oracle, 4, 10) == [[], [], []]
+    assert page(oracle, 10, 10) == [[], [], []]
+    # offset + limit overflows
+    assert page(oracle, 2, 2 ** 256 - 1) == [operations[2:], [1, 2], [2 ** 2 + 2 ** 3, 2 ** 4]]
@@ -0,0 +1,156 @@
+import threading
+import time
+
+from smartz.serving import ConstructorService
+
+
+class StubWork(object):
+    """
+    Construct stand-in which blocks until released.
+    """
+
+    def __init__(self, result=None, error=None):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.result = result if result is not None else {'result': 'success'}
+        self.error = error
+
+    def __call__(self, fields_vals):
+        self.calls.append(fields_vals)
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def start(service, fields_vals, results):
+    def request():
+        try:
+            results.append(service.construct(fields_vals))
+        except Exception as exc:
+            results.append(exc)
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    return thread
+
+
+def wait_for(condition):
+    deadline = time.time() + 5
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def test_identical_requests_are_coalesced():
+    work = StubWork()
+    service = ConstructorService(work=work)
+    results = []
+
+    threads = [start(service, {'price': 1}, results)]
+    assert work.started.wait(5)
+    threads += [start(service, {'price': 1}, results) for _ in range(4)]
+    wait_for(lambda: service.stats()['coalesced'] == 4)
+    work.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(work.calls) == 1
+    assert results == [work.result] * 5
+
+    stats = service.stats()
+    assert stats['requests'] == 5
+    assert stats['queue_depth'] == 0
+    assert stats['latency']['p99'] is not None
+    assert len(service._in_flight) == 0
+
+
+def test_distinct_requests_are_not_coalesced():
+    work = StubWork()
+    work.release.set()
+    service = ConstructorService(work=work)
+
+    service.construct({'price': 1})
+    service.construct({'price': 2})
+    service.construct({'price': 1})
+
+    assert work.calls == [{'price': 1}, {'price': 2}, {'price': 1}]
+    assert service.stats()['coalesced'] == 0
+
+
+def test_rejected_when_overloaded():
+    work = StubWork()
+    service = ConstructorService(work=work, max_concurrent=1, queue_timeout=0.01)
+    results = []
+
+    thread = start(service, {'price': 1}, results)
+    assert work.started.wait(5)
+
+    result = service.construct({'price': 2})
+    assert result['result'] == 'error'
+    assert 'overloaded' in result['error_descr']
+    assert service.stats()['rejected'] == 1
+    assert service.stats()['queue_depth'] == 1
+
+    work.release.set()
+    thread.join()
+    assert results == [work.result]
+
+    # the slot and the key of the rejected request are free again
+    assert service.construct({'price': 2}) == work.result
+    assert service.stats()['queue_depth'] == 0
+
+
+def test_coalesced_request_times_out():
+    work = StubWork()
+    service = ConstructorService(work=work, timeout=0.01)
+    results = []
+
+    thread = start(service, {'price': 1}, results)
+    assert work.started.wait(5)
+
+    result = service.construct({'price': 1})
+    assert result['result'] == 'error'
+    assert 'in time' in result['error_descr']
+    assert service.stats()['timed_out'] == 1
+
+    work.release.set()
+    thread.join()
+    assert results == [work.result]
+    assert service.stats()['queue_depth'] == 0
+    assert len(service._in_flight) == 0
+
+
+def test_error_is_raised_to_coalesced_requests():
+    work = StubWork(error=RuntimeError('solc failed'))
+    service = ConstructorService(work=work)
+    results = []
+
+    threads = [start(service, {'price': 1}, results)]
+    assert work.started.wait(5)
+    threads.append(start(service, {'price': 1}, results))
+    wait_for(lambda: service.stats()['coalesced'] == 1)
+    work.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 2
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert service.stats()['queue_depth'] == 0
+
+    # failed request is not cached
+    work.error = None
+    assert service.construct({'price': 1}) == work.result
+    assert len(work.calls) == 2
+
+
+def test_stats_without_requests():
+    service = ConstructorService(work=StubWork())
+
+    assert service.stats() == {
+        'queue_depth': 0, 'requests': 0, 'coalesced': 0, 'rejected': 0, 'timed_out': 0,
+        'wait_time': {'p50': None, 'p99': None, 'max': None},
+        'latency': {'p50': None, 'p99': None, 'max': None},
+    }
@@ -0,0 +1,178 @@
+import pytest
+
+from conftest import PRICE
+
+
+SUBSCRIBER_GAS = 300000
+
+# language=Solidity
+SUBSCRIBER_SOURCE = """
+pragma solidity ^0.4.24;
+
+contract OracleSubscriptions {
+    function subscribe(address _callback) public payable;
+    function unsubscribe(address _callback) public;
+}
+
+contract Subscriber {
+    address public oracle;
+    bool public unsubscribeOnData;
+
+    uint256 public value;
+    uint256 public updated;
+    uint256 public calls;
+
+    constructor(address _oracle, bool _unsubscribeOnData) public {
+        oracle = _oracle;
+        unsubscribeOnData = _unsubscribeOnData;
+    }
+
+    // subscribes with this contract as subscription owner
+    function subscribe() public payable {
+        OracleSubscriptions(oracle).subscribe.value(msg.value)(this);
+    }
+
+    function onOracleData(uint256 _data, uint256 _ts) external {
+        value = _data;
+        updated = _ts;
+        calls++;
+        if (unsubscribeOnData)
+            OracleSubscriptions(oracle).unsubscribe(this);
+    }
+
+    function () public payable {}
+}
+"""
+
+
+@pytest.fixture
+def oracle(deploy_oracle):
+    return deploy_oracle(subscriptions=True, subscriberGas=SUBSCRIBER_GAS)
+
+
+@pytest.fixture
+def deploy_subscribers(chain, execute):
+    """
+    Deploys subscriber contracts, one per element of unsubscribe_on_data, from accounts starting from the third.
+    """
+    abi, bytecode = chain.compile(SUBSCRIBER_SOURCE, 'Subscriber')
+    factory = chain.web3.eth.contract(abi=abi, bytecode=bytecode)
+
+    def deploy(oracle, unsubscribe_on_data):
+        receipts = execute(*[
+            (factory.constructor(oracle.address, flag), chain.accounts[2 + idx])
+            for idx, flag in enumerate(unsubscribe_on_data)
+        ])
+        if not isinstance(receipts, list):
+            receipts = [receipts]
+        return [chain.web3.eth.contract(address=receipt['contractAddress'], abi=abi) for receipt in receipts]
+
+    return deploy
+
+
+def subscribers_of(oracle):
+    count = oracle.functions.getSubscribersCount().call()
+    return [oracle.functions.subscribers(idx).call() for idx in range(count)]
+
+
+def test_callback_unsubscribes_itself(chain, oracle, deploy_subscribers, execute, update_data):
+    first, leaving, third, fourth = deploy_subscribers(oracle, [False, True, False, False])
+    receipts = execute(
+        (oracle.functions.subscribe(first.address), chain.accounts[2], 10 * PRICE),
+        (leaving.functions.subscribe(), chain.accounts[3], 10 * PRICE),
+        (oracle.functions.subscribe(third.address), chain.accounts[4], 10 * PRICE),
+        (oracle.functions.subscribe(fourth.address), chain.accounts[5], 10 * PRICE),
+    )
+    assert all(receipt['status'] == 1 for receipt in receipts)
+
+    update_data(oracle, 42, gas=5000000)
+
+    for subscriber in (first, leaving, third, fourth):
+        assert subscriber.functions.value().call() == 42
+        assert subscriber.functions.calls().call() == 1
+    assert sorted(subscribers_of(oracle)) == sorted([first.address, third.address, fourth.address])
+    assert oracle.functions.deliveryCursor().call() == 3
+    assert oracle.functions.subscriptions(leaving.address).call()[2] == 0
+
+    # leaving subscriber paid for one delivery and got the rest back
+    assert chain.web3.eth.get_balance(leaving.address) == 9 * PRICE
+    assert oracle.functions.subscribersBalance().call() == 3 * 9 * PRICE
+    assert chain.web3.eth.get_balance(oracle.address) == 3 * 9 * PRICE + 4 * PRICE
+
+
+def test_price_increase_drops_subscriber(chain, oracle, deploy_subscribers, execute, update_data):
+    subscriber, = deploy_subscribers(oracle, [False])
+    assert execute((oracle.functions.subscribe(subscriber.address), chain.accounts[2], 2 * PRICE))['status'] == 1
+
+    set_price = oracle.functions.setPrice(3 * PRICE, oracle.functions.nonce().call())
+    execute((set_price, chain.accounts[0]), (set_price, chain.accounts[1]))
+    assert oracle.functions.price().call() == 3 * PRICE
+
+    update_data(oracle, 42, gas=5000000)
+
+    assert subscriber.functions.calls().call() == 0
+    assert subscribers_of(oracle) == []
+    # prepaid ether is kept for refund
+    assert oracle.functions.subscribersBalance().call() == 2 * PRICE
+
+    assert execute((oracle.functions.claimRefund(), chain.accounts[3]))['status'] == 0
+    assert execute((oracle.functions.claimRefund(), chain.accounts[2]))['status'] == 1
+    assert oracle.functions.subscribersBalance().call() == 0
+    assert chain.web3.eth.get_balance(oracle.address) == 0
+    assert execute((oracle.functions.claimRefund(), chain.accounts[2]))['status'] == 0
+
+
+def test_withdraw_keeps_prepaid_ether(chain, oracle, deploy_subscribers, execute):
+    subscriber, = deploy_subscribers(oracle, [False])
+    assert execute((oracle.functions.subscribe(subscriber.address), chain.accounts[2], 10 * PRICE))['status'] == 1
+    assert execute((oracle.functions.getData(), chain.accounts[3], PRICE))['status'] == 1
+
+    too_much = oracle.functions.withdraw(chain.accounts[3], 2 * PRICE)
+    assert execute((too_much, chain.accounts[0]), (too_much, chain.accounts[1]))[1]['status'] == 0
+
+    earned = oracle.functions.withdraw(chain.accounts[3], PRICE)
+    assert execute((earned, chain.accounts[0]), (earned, chain.accounts[1]))[1]['status'] == 1
+    assert chain.web3.eth.get_balance(oracle.address) == 10 * PRICE
+
+
+def test_subscribe_during_unfinished_delivery(chain, oracle, deploy_subscribers, execute, update_data):
+    subscribers = deploy_subscribers(oracle, [False] * 8)
+    receipts = execute(*[
+        (oracle.functions.subscribe(subscriber.address), chain.accounts[2 + idx], 10 * PRICE)
+        for idx, subscriber in enumerate(subscribers)
+    ])
+    assert all(receipt['status'] == 1 for receipt in receipts)
+
+    update_data(oracle, 42, gas=700000)
+    delivered = oracle.functions.deliveryCursor().call()
+    assert 0 < delivered < 8
+
+    late, = deploy_subscribers(oracle, [False])
+    assert execute((oracle.functions.subscribe(late.address), chain.accounts[10], 10 * PRICE))['status'] == 1
+    assert oracle.functions.deliveryCursor().call() == delivered
+    assert oracle.functions.getSubscribersCount().call() == 9
+
+    # delivery must make progress, so it can't be done with too little gas
+    assert execute((oracle.functions.deliver(), chain.accounts[11]), gas=SUBSCRIBER_GAS)['status'] == 0
+
+    assert execute((oracle.functions.deliver(), chain.accounts[11]), gas=5000000)['status'] == 1
+    assert oracle.functions.deliveryCursor().call() == 9
+    for subscriber in subscribers + [late]:
+        assert subscriber.functions.value().call() == 42
+        assert subscriber.functions.calls().call() == 1
+
+    # nothing left to deliver
+    assert execute((oracle.functions.deliver(), chain.accounts[11]), gas=5000000)['status'] == 0
+
+
+def test_failed_callback_is_charged(chain, oracle, execute, update_data):
+    # the oracle has no onOracleData, so calls to it fail
+    assert execute((oracle.functions.subscribe(oracle.address), chain.accounts[2], 10 * PRICE))['status'] == 1
+
+    receipt = update_data(oracle, 42, gas=5000000)
+
+    failed = oracle.events.DeliveryFailed().process_receipt(receipt)
+    assert [event['args']['callback'] for event in failed] == [oracle.address]
+    assert subscribers_of(oracle) == [oracle.address]
+    assert oracle.functions.subscriptions(oracle.address).call()[1] == 9 * PRICE
+    assert oracle.functions.subscribersBalance().call() == 9 * PRICE